@@ -2,28 +2,42 @@ import calendar
 import csv
 import dataclasses
 import enum
-import json
+import hashlib
+import pickle
 import re
+import sys
+import threading
+import time
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime
-from decimal import Decimal
-from functools import partial
+from decimal import Decimal, InvalidOperation
+from functools import cached_property, lru_cache, partial
 from io import StringIO
 from itertools import chain
 from pathlib import Path
-from typing import Callable, ClassVar, Dict, Iterator, List, Optional, Set, Tuple, Union
+from typing import Callable, ClassVar, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple, Union
 from urllib.parse import urlparse
 
 import arrow
 import click
 import dacite
-import funcy
+import orjson
 import requests
 import toml
 from colorama import Fore, Style
+from urllib3.util.retry import Retry
 
 from firefly_ynab4_importer import VERSION
 
+# for dataclasses that are created for every transaction - skips the per-instance __dict__ where slots are supported
+# (slotted dataclasses are new classes, so their methods can't use zero-argument super())
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# version of the parsed YNAB data cache - bump whenever parsing, YNABTransaction or YNABBudget change, since the cache
+# would otherwise hand back objects parsed by the old code
+PARSED_CACHE_SCHEMA = 1
+
 YNAB_TRANSACTION_FIELDS = [
     # Which account is this entry for?
     "Account",
@@ -70,6 +84,9 @@ YNAB_BUDGET_FIELDS = [
     "Category Balance",
 ]
 
+# amounts are compared against zero for every transaction, so avoid coercing an int each time
+ZERO = Decimal(0)
+
 # args: currency code, default currency amount, date, memo amount in foreign currency
 # return value: amount in foreign currency
 ForexCalculator = Callable[[str, Decimal, arrow.Arrow, Optional[Decimal]], Decimal]
@@ -102,21 +119,28 @@ class YNABTransaction:
 
     @property
     def is_expense(self) -> bool:
-        return self.outflow > 0
+        return self.outflow > ZERO
 
     @property
     def is_deposit(self) -> bool:
-        return self.inflow > 0
+        return self.inflow > ZERO
 
-    @property
+    # checked repeatedly for every transaction, so only scan the payee once (cached_property stores the value in the
+    # instance __dict__ which works for frozen dataclasses, and copies from dataclasses.replace() start afresh)
+    @cached_property
     def is_transfer(self) -> bool:
         return "Transfer : " in self.payee
 
+    @cached_property
+    def abs_amount(self) -> Decimal:
+        # exact, so amounts in currencies with more than two decimals don't collide
+        return abs(self.outflow - self.inflow).normalize()
+
     @property
     def is_starting_balance(self) -> bool:
         return self.payee == "Starting Balance"
 
-    @property
+    @cached_property
     def transfer_account(self) -> str:
         if " / Transfer : " in self.payee:
             return self.payee.split(" / ")[1].split(" : ")[1]
@@ -131,10 +155,11 @@ class YNABTransaction:
         if not self.is_transfer:
             return self
 
-        tx = YNABTransferTransaction(**dataclasses.asdict(self))
+        # fields are all immutable, so a shallow copy is enough - dataclasses.asdict() would deep copy every field
+        tx = YNABTransferTransaction(**{field.name: getattr(self, field.name) for field in dataclasses.fields(self)})
         account_from_payee = self.transfer_account
 
-        if self.outflow > 0:
+        if self.outflow > ZERO:
             return dataclasses.replace(tx, payee=account_from_payee)
 
         real_from_account = account_from_payee
@@ -160,7 +185,7 @@ class YNABTransaction:
         foreign_currency_code = config.account(foreign_account).currency
 
         # try to use memo to find real value at the time of transaction
-        m = self.MEMO_RE.match(self.memo)
+        m = _match_memo(self.memo)
         if m and m.group(1) == foreign_currency_code:
             # use memo - yaay!
             amount = Decimal(m.group(2).replace(",", ""))
@@ -194,6 +219,12 @@ class YNABTransaction:
         )
 
 
+@lru_cache(maxsize=4096)
+def _match_memo(memo: str) -> Optional[re.Match]:
+    # foreign transactions get fixed up more than once (e.g. for running balance), so don't re-scan the same memo
+    return YNABTransaction.MEMO_RE.match(memo)
+
+
 @dataclasses.dataclass(frozen=True)
 class YNABTransferTransaction(YNABTransaction):
     @property
@@ -224,6 +255,19 @@ class YNABBudget:
         return self.category.startswith("Pre-YNAB Debt")
 
 
+# arrow date format tokens that have a direct strptime equivalent
+STRPTIME_TOKENS = {"YYYY": "%Y", "YY": "%y", "MM": "%m", "M": "%m", "DD": "%d", "D": "%d"}
+
+
+def _strptime_format(arrow_format: str) -> Optional[str]:
+    """
+    Translates an arrow date format into a strptime one, if possible
+    """
+    if not all(token in STRPTIME_TOKENS for token in re.findall(r"[A-Za-z]+", arrow_format)):
+        return None
+    return re.sub(r"[A-Za-z]+", lambda m: STRPTIME_TOKENS[m.group()], arrow_format.replace("%", "%%"))
+
+
 @dataclasses.dataclass(frozen=True)
 class Config:
     """
@@ -251,6 +295,9 @@ class Config:
         # Mark account as inactive after import
         inactive: bool = False
 
+    # used for accounts without any customization
+    DEFAULT_ACCOUNT: ClassVar[Account] = Account()
+
     # All of your YNAB accounts - only need to add here if there's some customization to be done.
     accounts: Dict[str, Account] = dataclasses.field(default_factory=dict)
 
@@ -286,13 +333,29 @@ class Config:
     # This is also the value that'll get used if `memo_to_description` is false.
     empty_description: str = "(empty description)"
 
+    # derived from the fields above in __post_init__
+    _foreign_accounts: FrozenSet[str] = dataclasses.field(init=False, repr=False, compare=False)
+    _strptime_date_format: Optional[str] = dataclasses.field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # looked up several times for every transaction, so figure out foreign accounts just once
+        object.__setattr__(
+            self,
+            "_foreign_accounts",
+            frozenset(name for name, acc in self.accounts.items() if acc.currency and acc.currency != self.currency),
+        )
+        # strptime is much faster than arrow's parser - use it whenever the format allows
+        object.__setattr__(self, "_strptime_date_format", _strptime_format(self.date_format))
+
     def account(self, acc: str) -> Account:
-        return self.accounts.get(acc, Config.Account())
+        return self.accounts.get(acc, self.DEFAULT_ACCOUNT)
 
     def is_foreign(self, acc: str) -> bool:
-        return bool(self.account(acc).currency and self.account(acc).currency != self.currency)
+        return acc in self._foreign_accounts
 
     def parse_date(self, dt: str) -> arrow.Arrow:
+        if self._strptime_date_format:
+            return arrow.Arrow.fromdatetime(datetime.strptime(dt, self._strptime_date_format))
         return arrow.get(dt, self.date_format)
 
 
@@ -314,12 +377,12 @@ class ImportData:
         opening_date: Optional[arrow.Arrow] = None
         monthly_payment_date: Optional[arrow.Arrow] = None
         role: Role = Role.default
-        opening_balance: Union[Decimal, Callable[[], Decimal]] = Decimal(0)
+        opening_balance: Union[Decimal, Callable[[], Decimal]] = ZERO
         currency_code: str = "USD"
 
     @dataclasses.dataclass(frozen=True)
     class TransactionGroup:
-        @dataclasses.dataclass(frozen=True)
+        @dataclasses.dataclass(frozen=True, **DATACLASS_SLOTS)
         class TransactionMetadata:
             date: arrow.Arrow
             amount: Union[Decimal, Callable[[], Decimal]]
@@ -330,21 +393,55 @@ class ImportData:
             # this field is used to de-duplicate transactions with the same amount
             external_id: str
 
-        @dataclasses.dataclass(frozen=True)
+            def _to_api_dict(self, firefly_ids: "FireflyIds") -> dict:
+                """
+                Firefly transaction split for this transaction, once the objects it refers to exist in Firefly
+                """
+                return {
+                    "original_source": f"Firefly-YNAB4-Importer-v{VERSION}",
+                    "type": self.__class__.__name__.lower(),
+                    "date": self.date,
+                    "amount": self.amount,
+                    "description": self.description,
+                    "tags": self.tags,
+                    "notes": self.notes,
+                    "reconciled": self.reconciled,
+                    "external_id": self.external_id,
+                }
+
+        @dataclasses.dataclass(frozen=True, **DATACLASS_SLOTS)
         class Withdrawal(TransactionMetadata):
             account: str
             payee: str
             budget: str
             category: str
 
-        @dataclasses.dataclass(frozen=True)
+            def _to_api_dict(self, firefly_ids: "FireflyIds") -> dict:
+                return {
+                    **ImportData.TransactionGroup.TransactionMetadata._to_api_dict(self, firefly_ids),
+                    "source_id": firefly_ids.asset_accounts[self.account],
+                    "destination_id": firefly_ids.expense_accounts[self.payee],
+                    **({"budget_id": firefly_ids.budgets[self.budget]} if self.budget else {}),
+                    **({"category_id": firefly_ids.categories[self.category]} if self.category else {}),
+                }
+
+        @dataclasses.dataclass(frozen=True, **DATACLASS_SLOTS)
         class Deposit(TransactionMetadata):
             account: str
             payee: str
             budget: str
             category: str
 
-        @dataclasses.dataclass(frozen=True)
+            def _to_api_dict(self, firefly_ids: "FireflyIds") -> dict:
+                return {
+                    **ImportData.TransactionGroup.TransactionMetadata._to_api_dict(self, firefly_ids),
+                    "source_id": firefly_ids.revenue_accounts[self.payee],
+                    "destination_id": firefly_ids.asset_accounts[self.account],
+                    **({"budget_id": firefly_ids.budgets[self.budget]} if self.budget else {}),
+                    **({"category_id": firefly_ids.categories[self.category]} if self.category else {}),
+                }
+
+        @dataclasses.dataclass(frozen=True, **DATACLASS_SLOTS)
         class Transfer(TransactionMetadata):
             from_account: str
             to_account: str
@@ -353,6 +450,18 @@ class ImportData:
             # must be set if foreign_amount is set
             foreign_currency_code: Optional[str] = None
 
+            def _to_api_dict(self, firefly_ids: "FireflyIds") -> dict:
+                return {
+                    **ImportData.TransactionGroup.TransactionMetadata._to_api_dict(self, firefly_ids),
+                    "source_id": firefly_ids.asset_accounts[self.from_account],
+                    "destination_id": firefly_ids.asset_accounts[self.to_account],
+                    **(
+                        {"foreign_amount": self.foreign_amount, "foreign_currency_code": self.foreign_currency_code}
+                        if self.foreign_amount
+                        else {}
+                    ),
+                }
+
         title: str = ""
         transactions: List[Union[Withdrawal, Deposit, Transfer]] = dataclasses.field(default_factory=list)
 
@@ -379,8 +488,8 @@ class ImportData:
     transaction_groups: List[TransactionGroup] = dataclasses.field(default_factory=list)
 
     # not used for imports - only for verification
-    # map of month to map of account name to running balance at the *end* of that month
-    running_balances: Dict[arrow.Arrow, Dict[str, Decimal]] = dataclasses.field(
+    # map of month (year, month) to map of account name to running balance at the *end* of that month
+    running_balances: Dict[Tuple[int, int], Dict[str, Decimal]] = dataclasses.field(
         default_factory=lambda: defaultdict(dict)
     )
 
@@ -404,13 +513,63 @@ class FireflyData:
     # map of foreign currency to map of date to converstion ratio for converting from default currency to this currency
     forex_conversion: Dict[Tuple[str, arrow.Arrow], Decimal] = dataclasses.field(default_factory=dict)
 
+    def __setstate__(self, state: dict) -> None:
+        # unpickling skips __init__, so fill in defaults for fields added since the cache was written (and drop any
+        # that have been removed)
+        for field in dataclasses.fields(self):
+            if field.name in state:
+                value = state[field.name]
+            elif field.default_factory is not dataclasses.MISSING:
+                value = field.default_factory()
+            else:
+                value = field.default
+            setattr(self, field.name, value)
+
+
+@dataclasses.dataclass(frozen=True)
+class FireflyIds:
+    """
+    Firefly ids by name of the objects that transactions refer to - indexed once from FireflyData rather than
+    looked up and converted for every transaction
+    """
+
+    asset_accounts: Dict[str, int]
+    revenue_accounts: Dict[str, int]
+    expense_accounts: Dict[str, int]
+    budgets: Dict[str, int]
+    categories: Dict[str, int]
+
+    @classmethod
+    def from_firefly_data(cls, firefly_data: FireflyData) -> "FireflyIds":
+        return cls(
+            asset_accounts={name: int(data["id"]) for name, data in firefly_data.asset_accounts.items()},
+            revenue_accounts={name: int(data["id"]) for name, data in firefly_data.revenue_accounts.items()},
+            expense_accounts={name: int(data["id"]) for name, data in firefly_data.expense_accounts.items()},
+            budgets={name: int(data["id"]) for name, data in firefly_data.budgets.items()},
+            categories=dict(firefly_data.categories),
+        )
+
 
 AMOUNT_RE = re.compile(r"^(-)?[^0-9]*([0-9,.]+)$")
 
+# currency symbols as exported by YNAB, e.g. -$1,234.56
+AMOUNT_CURRENCY_SYMBOLS = "$€£¥₹"
+AMOUNT_CHARS = "0123456789,."
+
 DUPLICATE_TX_RE = re.compile(r"^Duplicate of transaction #([0-9]+)\.$")
 
 
 def _to_amount(s: str) -> Decimal:
+    # fast path for the usual format (optional sign, currency symbol, then nothing but digits and separators), which
+    # gives the same result as the regex - anything else goes through the regex
+    negative = s.startswith("-")
+    digits = s[negative:].lstrip(AMOUNT_CURRENCY_SYMBOLS)
+    if digits and digits[0].isdigit() and not digits.strip(AMOUNT_CHARS):
+        try:
+            amount = Decimal(digits.replace(",", ""))
+            return -amount if negative else amount
+        except InvalidOperation:
+            pass
     m = AMOUNT_RE.match(s)
     assert m, f"Invalid value with no amount: |{s}|"
     amount = Decimal(m.group(2).replace(",", ""))
@@ -433,6 +592,33 @@ def _firefly_compare(obj: dict, firefly_obj: dict) -> bool:
     return obj == firefly_obj
 
 
+# account attributes that are compared against for updates or otherwise read back - accounts are cached with just these
+ASSET_ACCOUNT_ATTRIBUTES = (
+    "name",
+    "active",
+    "type",
+    "account_role",
+    "currency_id",
+    "include_net_worth",
+    "opening_balance",
+    "opening_balance_date",
+    "credit_card_type",
+    "monthly_payment_date",
+    "current_balance",
+)
+PAYEE_ACCOUNT_ATTRIBUTES = ("name", "active", "type", "include_net_worth")
+
+
+def _firefly_slim(firefly_obj: dict, attributes: Tuple[str, ...]) -> dict:
+    """
+    Copy of firefly object with only id and the given attributes
+    """
+    return {
+        "id": firefly_obj["id"],
+        "attributes": {k: firefly_obj["attributes"][k] for k in attributes if k in firefly_obj["attributes"]},
+    }
+
+
 def _firefly_needs_update(obj: dict, firefly_obj: dict) -> bool:
     needs_update = False
     for k, v in obj.items():
@@ -463,7 +649,7 @@ def _firefly_create_transaction_errors(
     #       "transactions.0.description": ["Duplicate of transaction #7995."]
     #    }
     # }
-    for field, field_errors in response.json()["errors"].items():
+    for field, field_errors in orjson.loads(response.content)["errors"].items():
         split = field.split(".")
         field = split[0]
         if field != "transactions":
@@ -496,10 +682,17 @@ def _split_key(tx: YNABTransaction) -> tuple:
         return tx.account, None, tx.is_deposit, tx.date, tx.running_balance
 
 
+# called for every budget row, but there are only so many distinct months
+@lru_cache(maxsize=512)
 def end_of_month(date: arrow.Arrow) -> arrow.Arrow:
     return date.replace(day=calendar.monthrange(date.year, date.month)[1])
 
 
+def _run_in_order(steps: List[Callable[[], None]]) -> None:
+    for step in steps:
+        step()
+
+
 class ProgressBar:
     """
     Call in a loop to create terminal progress bar
@@ -514,6 +707,7 @@ class ProgressBar:
         length: int = 100,
         fill: str = "█",
         print_end: str = "\r",
+        min_interval: float = 0.1,
     ):
         """
         Create new progress bar. Once created, simply call .print() once every iteration.
@@ -525,6 +719,7 @@ class ProgressBar:
         :param length: character length of bar
         :param fill: bar fill character
         :param print_end: end character (e.g. "\r", "\r\n")
+        :param min_interval: minimum seconds between redraws (the last iteration is always drawn)
         """
         self.total = total
         self.prefix = prefix
@@ -533,6 +728,10 @@ class ProgressBar:
         self.length = length
         self.fill = fill
         self.print_end = print_end
+        self.min_interval = min_interval
+        # only redraw when the bar actually changes, and not too often
+        self._last_filled_length = -1
+        self._last_print_time = float("-inf")
 
     def print(self, iteration: int) -> None:
         """
@@ -540,9 +739,17 @@ class ProgressBar:
 
         :param iteration: current iteration
         """
+        filled_length = int(self.length * iteration // self.total)
+        if iteration != self.total:
+            if filled_length == self._last_filled_length:
+                return
+            now = time.monotonic()
+            if now - self._last_print_time < self.min_interval:
+                return
+            self._last_print_time = now
+        self._last_filled_length = filled_length
         percent = 100 * (iteration / float(self.total))
         # percent = ("{0:." + str(decimals) + "f}").format(100 * (iteration / float(total)))
-        filled_length = int(self.length * iteration // self.total)
         bar = self.fill * filled_length + "-" * (self.length - filled_length)
         print(f"\r{self.prefix} |{bar}| {percent:0.{self.decimals}f}% {self.suffix}", end=self.print_end)
         # Print New Line on Complete
@@ -550,13 +757,40 @@ class ProgressBar:
             print()
 
 
+# how many requests to have in flight at once when creating objects in firefly
+MAX_CONCURRENT_REQUESTS = 8
+# how many account balances to fetch at once when verifying running balances
+MAX_CONCURRENT_VERIFY_REQUESTS = 4
+
+
+class FireflyRetry(Retry):
+    # firefly rejects a rate limited request before doing anything with it, so even a POST is safe to retry on a 429 -
+    # any other status is only retried for idempotent methods, as usual
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method.upper() == "POST" and status_code == 429:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
 class FireflySession(requests.Session):
-    def __init__(self, firefly_url: str, firefly_token: str):
+    def __init__(self, firefly_url: str, firefly_token: str, pool_maxsize: int = MAX_CONCURRENT_REQUESTS):
+        """
+        :param pool_maxsize: connections to keep alive, should cover every thread that makes requests concurrently
+        """
         self.firefly_url = firefly_url
         self.firefly_token = firefly_token
 
         super().__init__()
 
+        # keep enough connections to firefly alive for concurrent requests, and retry transient failures (only for
+        # idempotent methods, except for 429 - see FireflyRetry). 500 isn't retried since firefly returns it
+        # spuriously for some requests that did work (see _create_budget). Failed responses are still returned after
+        # the last retry so that callers see the usual HTTPError
+        retry = FireflyRetry(total=3, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504], raise_on_status=False)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
         self.headers["Accept"] = "application/json"
         self.headers["Authorization"] = f"Bearer {self.firefly_token}"
         self.headers["Content-Type"] = "application/json"
@@ -584,7 +818,7 @@ class FireflySession(requests.Session):
         if "print_failures" in kwargs:
             print_failures = kwargs.pop("print_failures")
         if "json" in kwargs:
-            kwargs["data"] = json.dumps(kwargs.pop("json"), default=self._json_default)
+            kwargs["data"] = orjson.dumps(kwargs.pop("json"), default=self._json_default)
         response = super().request(method, url, **kwargs)
         if not response.ok:
             if print_failures and (method in ["PUT", "POST"] or response.status_code == 500):
@@ -594,20 +828,19 @@ class FireflySession(requests.Session):
 
     def get_all_pages(self, url, params=None, **kwargs) -> dict:
         response = self.get(url, params=params, **kwargs)
+        # decode each page just once
+        payload = orjson.loads(response.content)
 
-        all_response = {"data": response.json()["data"]}
+        all_response = {"data": payload["data"]}
 
-        while (
-            response.json()["meta"]["pagination"]["current_page"]
-            != response.json()["meta"]["pagination"]["total_pages"]
-        ):
-            if not params:
-                params = {}
-            params["page"] = response.json()["meta"]["pagination"]["current_page"] + 1
+        while payload["meta"]["pagination"]["current_page"] != payload["meta"]["pagination"]["total_pages"]:
+            params = dict(params or {})
+            params["page"] = payload["meta"]["pagination"]["current_page"] + 1
 
             response = self.get(url, params=params, **kwargs)
+            payload = orjson.loads(response.content)
 
-            all_response["data"].extend(response.json()["data"])
+            all_response["data"].extend(payload["data"])
 
         return all_response
 
@@ -635,7 +868,10 @@ class Importer:
             Config, toml.load(config_path), config=dacite.Config(cast=[Decimal, Config.Account.Role], strict=True)
         )
         print(f"Loaded config for import into {firefly_url}")
+        self._category_attr = _ynab_field_name(self.config.category_field)
+        self._budget_attr = _ynab_field_name(self.config.budget_field)
 
+        self.config_path = config_path
         self.register_path = register_path
         self.budget_path = budget_path
 
@@ -645,10 +881,23 @@ class Importer:
         self.all_transactions: List[YNABTransaction] = []
         self.all_budgets: List[YNABBudget] = []
 
-        self._session = FireflySession(firefly_url, firefly_token)
+        # setup chains make requests of their own, alongside those of the request and verify pools
+        self._session = FireflySession(
+            firefly_url,
+            firefly_token,
+            pool_maxsize=MAX_CONCURRENT_REQUESTS + MAX_CONCURRENT_VERIFY_REQUESTS + len(self._setup_chains()),
+        )
+        self._forex_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        # shared by everything that makes many independent requests to firefly
+        self._requests_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS)
+        # separate from the above so that verification never queues up behind transactions being created
+        self._verify_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_VERIFY_REQUESTS)
 
         self._cache_dir = Path(".cache")
-        self._cache_path = self._cache_dir / "firefly_data.json"
+        self._cache_path = self._cache_dir / "firefly_data.pkl"
+        # caches from older versions are read if there's no pickled cache yet
+        self._json_cache_path = self._cache_dir / "firefly_data.json"
 
     def run(self, dry_run: bool = False):
         if not dry_run:
@@ -662,17 +911,28 @@ class Importer:
 
         if not dry_run:
             self._load_cache()
+            # sets the default currency, which anything created without an explicit currency gets
             self._create_currencies()
-            self._create_categories()
-            self._create_budgets()
-            self._create_budget_limits()
-            self._create_available_budgets()
-            self._create_asset_accounts()
-            self._create_payee_accounts("revenue")
-            self._create_payee_accounts("expense")
+            chains = self._setup_chains()
+            with ThreadPoolExecutor(max_workers=len(chains)) as pool:
+                for future in [pool.submit(_run_in_order, chain) for chain in chains]:
+                    future.result()
             # self._create_transactions()
             self._post_import()
 
+    def _setup_chains(self) -> List[List[Callable[[], None]]]:
+        """
+        Steps for setting up everything transactions refer to, once currencies are set up. Steps only depend on the
+        ones before them in the same chain, so the chains are run concurrently
+        """
+        return [
+            [self._create_asset_accounts],
+            [self._create_categories],
+            [self._create_budgets, self._create_budget_limits, self._create_available_budgets],
+            [partial(self._create_payee_accounts, "revenue")],
+            [partial(self._create_payee_accounts, "expense")],
+        ]
+
     def _payee(self, tx: YNABTransaction) -> str:
         return self.config.payee_mapping.get(tx.payee.strip(), tx.payee.strip())
 
@@ -681,13 +941,17 @@ class Importer:
     ) -> Decimal:
         conv_rate = self.firefly_data.forex_conversion.get((currency_code, date))
         if conv_rate is None:
-            response = requests.get(
-                f"https://api.exchangeratesapi.io/{date.format('YYYY-MM-DD')}",
-                params={"base": self.config.currency, "symbols": currency_code},
-            )
-            conv_rate = Decimal(response.json()["rates"][currency_code])
-            self.firefly_data.forex_conversion[(currency_code, date)] = conv_rate
-            self._update_cache()
+            # transactions are created concurrently, and this updates the cache
+            with self._forex_lock:
+                conv_rate = self.firefly_data.forex_conversion.get((currency_code, date))
+                if conv_rate is None:
+                    response = requests.get(
+                        f"https://api.exchangeratesapi.io/{date.format('YYYY-MM-DD')}",
+                        params={"base": self.config.currency, "symbols": currency_code},
+                    )
+                    conv_rate = Decimal(response.json()["rates"][currency_code])
+                    self.firefly_data.forex_conversion[(currency_code, date)] = conv_rate
+                    self._update_cache()
         foreign_amount = round(amount * conv_rate, 2)
         if memo_amount and abs(memo_amount - foreign_amount) / memo_amount > 0.20:
             raise ValueError(f"Forex calculator amount: {foreign_amount} much different from memo: {memo_amount}")
@@ -731,10 +995,10 @@ class Importer:
             return amount
 
     def _category(self, tx: Union[YNABTransaction, YNABBudget]) -> str:
-        return getattr(tx, _ynab_field_name(self.config.category_field))
+        return getattr(tx, self._category_attr)
 
     def _budget(self, tx: Union[YNABTransaction, YNABBudget]) -> str:
-        budget = getattr(tx, _ynab_field_name(self.config.budget_field))
+        budget = getattr(tx, self._budget_attr)
         if tx.master_category == "Hidden Categories":
             budget = budget.split("`")[1].strip() + " (hidden)"
         budget = budget.strip()
@@ -758,67 +1022,94 @@ class Importer:
 
     def _read_ynab_data(self):
         assert not self.all_transactions and not self.all_budgets, "Already read!"
+        parsed_cache_path = self._cache_dir / f"parsed_{self._inputs_fingerprint()}.pkl"
+        if self._load_parsed_cache(parsed_cache_path):
+            return
+
+        # registers have many transactions on the same day, and budgets have a row per category per month, so only
+        # parse each distinct date string once
+        parse_date = lru_cache(maxsize=None)(self.config.parse_date)
+
+        @lru_cache(maxsize=None)
+        def parse_month(month: str) -> arrow.Arrow:
+            return arrow.Arrow.fromdatetime(datetime.strptime(month, "%B %Y"))
+
         with open(self.register_path) as f:
-            reader = csv.DictReader(f, fieldnames=YNAB_TRANSACTION_FIELDS)
+            # rows are unpacked by position (see YNAB_TRANSACTION_FIELDS) rather than building a dict per row
+            reader = csv.reader(f)
             # skip header
             next(reader)
-            all_transactions = list(reader)
-        self.all_transactions = [
-            YNABTransaction(
-                account=tx["Account"],
-                flag=tx["Flag"],
-                date=self.config.parse_date(tx["Date"]),
-                payee=tx["Payee"],
-                category=tx["Category"],
-                master_category=tx["Master Category"],
-                sub_category=tx["Sub Category"],
-                memo=tx["Memo"],
-                outflow=_to_amount(tx["Outflow"]),
-                inflow=_to_amount(tx["Inflow"]),
-                cleared=tx["Cleared"],
-                running_balance=_to_amount(tx["Running Balance"]),
-            )
-            for tx in all_transactions
-        ]
+            # skip blank lines - lazily, so rows are built straight off the reader and never all held in memory
+            rows = filter(None, reader)
+            self.all_transactions = [
+                YNABTransaction(
+                    account=account,
+                    flag=flag,
+                    date=parse_date(date),
+                    payee=payee,
+                    category=category,
+                    master_category=master_category,
+                    sub_category=sub_category,
+                    memo=memo,
+                    outflow=_to_amount(outflow),
+                    inflow=_to_amount(inflow),
+                    cleared=cleared,
+                    running_balance=_to_amount(running_balance),
+                )
+                for (
+                    account,
+                    flag,
+                    _check_number,
+                    date,
+                    payee,
+                    category,
+                    master_category,
+                    sub_category,
+                    memo,
+                    outflow,
+                    inflow,
+                    cleared,
+                    running_balance,
+                ) in rows
+            ]
         print(f"Loaded {len(self.all_transactions)} transactions")
 
         with open(self.budget_path) as f:
-            reader = csv.DictReader(f, fieldnames=YNAB_BUDGET_FIELDS)
+            # rows are unpacked by position (see YNAB_BUDGET_FIELDS) rather than building a dict per row
+            reader = csv.reader(f)
             # skip header
             next(reader)
-            all_budgets = list(reader)
-        self.all_budgets = [
-            YNABBudget(
-                month=arrow.get(bg["Month"], "MMMM YYYY"),
-                category=bg["Category"],
-                master_category=bg["Master Category"],
-                sub_category=bg["Sub Category"],
-                budgeted=_to_amount(bg["Budgeted"]),
-                outflows=_to_amount(bg["Outflows"]),
-                category_balance=_to_amount(bg["Category Balance"]),
-            )
-            for bg in all_budgets
-        ]
+            # skip blank lines
+            rows = filter(None, reader)
+            self.all_budgets = [
+                YNABBudget(
+                    month=parse_month(month),
+                    category=category,
+                    master_category=master_category,
+                    sub_category=sub_category,
+                    budgeted=_to_amount(budgeted),
+                    outflows=_to_amount(outflows),
+                    category_balance=_to_amount(category_balance),
+                )
+                for month, category, master_category, sub_category, budgeted, outflows, category_balance in rows
+            ]
         print(f"Loaded {len(self.all_budgets)} budgets")
+        self._update_parsed_cache(parsed_cache_path)
 
     def _process_budgets(self):
         self.data.categories = list(
-            {self._category(bg) for bg in self.all_budgets if self._category(bg) and not bg.is_hidden}
+            {category for bg in self.all_budgets if not bg.is_hidden and (category := self._category(bg))}
         )
         # Two special categories for income
         if self.config.budget_field == "Category":
             self.data.categories.extend(["Income:Available this month", "Income:Available next month"])
         elif self.config.budget_field == "Sub Category":
             self.data.categories.extend(["Available this month", "Available next month"])
+        budgets = {
+            (budget, bg.is_hidden) for bg in self.all_budgets if not bg.is_pre_ynab and (budget := self._budget(bg))
+        }
         self.data.budgets.update(
-            {
-                budget: ImportData.Budget(name=budget, active=not hidden)
-                for budget, hidden in {
-                    (self._budget(bg), bg.is_hidden)
-                    for bg in self.all_budgets
-                    if not bg.is_pre_ynab and self._budget(bg)
-                }
-            }
+            {budget: ImportData.Budget(name=budget, active=not hidden) for budget, hidden in budgets}
         )
         # Two special budgets for managing YNAB Rule #4 - use last month's income
         self.data.budgets.update(
@@ -828,26 +1119,40 @@ class Importer:
             }
         )
         self.data.budget_history = [
-            ImportData.BudgetHistory(
-                name=self._budget(bg), amount=bg.budgeted, start=bg.month, end=end_of_month(bg.month),
-            )
+            ImportData.BudgetHistory(name=budget, amount=bg.budgeted, start=bg.month, end=end_of_month(bg.month))
             for bg in self.all_budgets
-            if not bg.is_pre_ynab and self._budget(bg) and bg.budgeted
+            if not bg.is_pre_ynab and bg.budgeted and (budget := self._budget(bg))
         ]
 
     def _process_accounts(self):
-        account_names = {tx.account for tx in self.all_transactions}
+        account_names: Set[str] = set()
+        starting_balances: Dict[str, Tuple[arrow.Arrow, Decimal]] = {}
+        # used to infer monthly payment date for credit cards
+        last_transfer_dates: Dict[str, arrow.Arrow] = {}
+        revenue_accounts: Set[str] = set()
+        expense_accounts: Set[str] = set()
+
+        # register is usually large, so gather everything in a single pass
+        for tx in self.all_transactions:
+            account_names.add(tx.account)
+            if tx.is_starting_balance:
+                starting_balances[tx.account] = (
+                    tx.date,
+                    self._starting_balance(tx, self.config, self._forex_calculator),
+                )
+            elif tx.is_transfer:
+                last_transfer_dates[tx.transfer_account] = tx.date
+            else:
+                if tx.is_deposit:
+                    revenue_accounts.add(self._payee(tx))
+                if tx.is_expense:
+                    expense_accounts.add(self._payee(tx))
+
         for acc in self.config.accounts:
             assert acc in account_names, f"Unknown account with no transactions in config: |{acc}|"
 
-        starting_balances: Dict[str, Tuple[arrow.Arrow, Decimal]] = {
-            tx.account: (tx.date, self._starting_balance(tx, self.config, self._forex_calculator))
-            for tx in self.all_transactions
-            if tx.is_starting_balance
-        }
-
         for acc in account_names:
-            start_date, balance = starting_balances.get(acc, (None, Decimal(0)))
+            start_date, balance = starting_balances.get(acc, (None, ZERO))
             account_config = self.config.account(acc)
             role = ImportData.Account.Role[account_config.role.name]
             monthly_payment_date = None
@@ -864,12 +1169,8 @@ class Importer:
                             raise ValueError(f"Unable to parse date: |{account_config.monthly_payment_date}|")
                 else:
                     try:
-                        monthly_payment_date = next(
-                            tx.date
-                            for tx in reversed(self.all_transactions)
-                            if tx.is_transfer and tx.transfer_account == acc
-                        )
-                    except StopIteration:
+                        monthly_payment_date = last_transfer_dates[acc]
+                    except KeyError:
                         print(f"[WARN] Couldn't figure out monthly payment date for {acc}, defaulting to 01/01")
                         monthly_payment_date = arrow.get("2020-01-01")  # year doesn't matter
             account = ImportData.Account(
@@ -881,20 +1182,8 @@ class Importer:
             )
             self.data.asset_accounts.append(account)
 
-        self.data.revenue_accounts = list(
-            {
-                self._payee(tx)
-                for tx in self.all_transactions
-                if tx.is_deposit and not tx.is_transfer and not tx.is_starting_balance
-            }
-        )
-        self.data.expense_accounts = list(
-            {
-                self._payee(tx)
-                for tx in self.all_transactions
-                if tx.is_expense and not tx.is_transfer and not tx.is_starting_balance
-            }
-        )
+        self.data.revenue_accounts = list(revenue_accounts)
+        self.data.expense_accounts = list(expense_accounts)
         print(
             f"Configured account data for {len(self.data.asset_accounts)} asset accounts, "
             f"{len(self.data.revenue_accounts)} revenue accounts, and {len(self.data.expense_accounts)} "
@@ -902,35 +1191,51 @@ class Importer:
         )
 
     def _process_transactions(self):
-        for tx in reversed(self.all_transactions):
-            tx_month = tx.date.replace(day=1)
-            if tx_month not in self.data.running_balances or tx.account not in self.data.running_balances[tx_month]:
-                self.data.running_balances[tx_month][tx.account] = self._running_balance(
-                    tx, self.config, self._forex_calculator
-                )
+        # running balance at the end of the month is the one on the last transaction of that month for that account
+        # months are keyed as (year, month) since that's cheaper than building an arrow object for every transaction
+        last_month_txs: Dict[Tuple[Tuple[int, int], str], YNABTransaction] = {}
+        splits_grouped: Dict[tuple, List[YNABTransaction]] = defaultdict(list)
+        # non-splits are groups of their own
+        non_splits: List[Tuple[YNABTransaction]] = []
+        for tx in self.all_transactions:
+            last_month_txs[((tx.date.year, tx.date.month), tx.account)] = tx
+            if (tx.inflow == ZERO and tx.outflow == ZERO) or tx.is_starting_balance:
+                continue
+            if "(Split " in tx.memo:
+                splits_grouped[_split_key(tx)].append(tx)
+            else:
+                non_splits.append((tx,))
 
-        transactions = funcy.remove(
-            lambda tx: (tx.inflow == 0 and tx.outflow == 0) or tx.is_starting_balance, self.all_transactions
-        )
-        splits, non_splits = funcy.split(lambda tx: "(Split " in tx.memo, transactions)
-        splits_grouped = funcy.group_by(_split_key, splits)
-        # process splits first because in case of transfers, we want to split version of Transfer rather than the other
-        all_tx_grouped = chain(splits_grouped.values(), map(lambda x: [x], non_splits))
+        for (tx_month, account), tx in last_month_txs.items():
+            self.data.running_balances[tx_month][account] = self._running_balance(
+                tx, self.config, self._forex_calculator
+            )
 
+        # process splits first because in case of transfers, we want to split version of Transfer rather than the other
         # because of stable sorting, splits on the same will appear before non-splits on that day
-        all_tx_grouped: Iterator[List[YNABTransaction]] = sorted(all_tx_grouped, key=lambda tx_group: tx_group[0].date)
+        # sort on the underlying datetime since comparing arrow objects is comparatively slow
+        all_tx_grouped: List[Sequence[YNABTransaction]] = sorted(
+            chain(splits_grouped.values(), non_splits), key=lambda tx_group: tx_group[0].date.datetime
+        )
 
         # used to de-dup transactions because YNAB will double-log every transfer
-        # map key: tuple of accounts (sorted by name), date, abs(outflow - inflow)
-        # map value: int - how many times this was seen. Max = 2
-        transfers_seen_map: Dict[Tuple[Tuple[str], arrow.Arrow, Decimal]] = {}
+        # key: tuple of accounts (sorted by name), abs(outflow - inflow)
+        # a key is in the set while the other side of that transfer is still to come
+        # both sides of a transfer are on the same day and groups are sorted by date, so this only holds the transfers
+        # of the current day (as an ordinal, which is much cheaper than arrow.Arrow)
+        transfers_seen: Set[Tuple[Tuple[str, str], Decimal]] = set()
+        transfers_seen_day: Optional[int] = None
 
         withdrawals_count = deposits_count = transfers_count = 0
 
+        # looked up for every transaction
+        empty_description = self.config.empty_description
+        budgets = self.data.budgets
+        categories = self.data.categories
+
         for tx_group in all_tx_grouped:
-            transaction_group = ImportData.TransactionGroup(
-                title=self.config.empty_description if len(tx_group) > 0 else ""
-            )
+            # groups are never empty
+            transaction_group = ImportData.TransactionGroup(title=empty_description)
 
             for tx in tx_group:
                 tx = tx.fix_transfer()
@@ -938,13 +1243,13 @@ class Importer:
 
                 budget = self._budget(tx)
                 if budget:
-                    assert budget in self.data.budgets, f"Unable to process transaction with unknown budget: |{budget}|"
+                    assert budget in budgets, f"Unable to process transaction with unknown budget: |{budget}|"
 
                     # ignore hidden categories
-                    if self.data.budgets[budget].active:
+                    if budgets[budget].active:
                         category = self._category(tx)
                         assert (
-                            not category or category in self.data.categories
+                            not category or category in categories
                         ), f"Unable to process transaction with unknown category: |{category}|"
                     else:
                         category = ""
@@ -957,27 +1262,36 @@ class Importer:
                 external_id = str(tx.running_balance)
 
                 if tx.is_transfer:
-                    date = tx.date
-                    transfer_seen_map_key = (
-                        tuple(sorted([tx.account, tx.payee])),
-                        date,
-                        abs(tx.outflow - tx.inflow),
-                    )
-                    if transfers_seen_map.get(transfer_seen_map_key, 0) % 2 == 1:
-                        transfers_seen_map[transfer_seen_map_key] += 1
+                    day = tx.date.toordinal()
+                    if day != transfers_seen_day:
+                        transfers_seen.clear()
+                        transfers_seen_day = day
+                    accounts = (tx.account, tx.payee) if tx.account <= tx.payee else (tx.payee, tx.account)
+                    transfer_seen_key = (accounts, tx.abs_amount)
+                    if transfer_seen_key in transfers_seen:
+                        transfers_seen.discard(transfer_seen_key)
                         continue
-                    transfers_seen_map[transfer_seen_map_key] = 1
+                    transfers_seen.add(transfer_seen_key)
+
+                # common to all kinds of transactions
+                amount = self._amount(tx)
+                description = self._description(tx)
+                notes = self._notes(tx)
+                tags = self._tags(tx)
+                reconciled = tx.cleared == "R"
+
+                if tx.is_transfer:
                     transfer = ImportData.TransactionGroup.Transfer(
                         from_account=tx.account,
                         to_account=tx.payee,
-                        date=date,
-                        amount=self._amount(tx),
-                        description=self._description(tx),
+                        date=tx.date,
+                        amount=amount,
+                        description=description,
                         foreign_amount=tx.foreign_amount,
                         foreign_currency_code=tx.foreign_currency,
-                        notes=self._notes(tx),
-                        tags=self._tags(tx),
-                        reconciled=tx.cleared == "R",
+                        notes=notes,
+                        tags=tags,
+                        reconciled=reconciled,
                         external_id=external_id,
                     )
                     transaction_group.transactions.append(transfer)
@@ -987,13 +1301,13 @@ class Importer:
                         account=tx.account,
                         date=tx.date,
                         payee=self._payee(tx),
-                        amount=self._amount(tx),
-                        description=self._description(tx),
+                        amount=amount,
+                        description=description,
                         budget=budget,
                         category=category,
-                        notes=self._notes(tx),
-                        tags=self._tags(tx),
-                        reconciled=tx.cleared == "R",
+                        notes=notes,
+                        tags=tags,
+                        reconciled=reconciled,
                         external_id=external_id,
                     )
                     transaction_group.transactions.append(withdrawal)
@@ -1003,13 +1317,13 @@ class Importer:
                         account=tx.account,
                         date=tx.date,
                         payee=self._payee(tx),
-                        amount=self._amount(tx),
-                        description=self._description(tx),
+                        amount=amount,
+                        description=description,
                         budget=budget,
                         category=category,
-                        notes=self._notes(tx),
-                        tags=self._tags(tx),
-                        reconciled=tx.cleared == "R",
+                        notes=notes,
+                        tags=tags,
+                        reconciled=reconciled,
                         external_id=external_id,
                     )
                     transaction_group.transactions.append(deposit)
@@ -1032,10 +1346,22 @@ class Importer:
 
     def _load_cache(self) -> None:
         if not self._cache_path.exists():
+            self._load_json_cache()
+            return
+
+        try:
+            # NOTE: unpickling can run arbitrary code, so the cache directory must be trusted (see README)
+            with open(self._cache_path, "rb") as f:
+                self.firefly_data = pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            pass
+
+    def _load_json_cache(self) -> None:
+        if not self._json_cache_path.exists():
             return
 
         try:
-            data = json.loads(self._cache_path.read_text())
+            data = orjson.loads(self._json_cache_path.read_bytes())
             # make JSON friendly
             data["forex_conversion"] = {
                 (split[0], arrow.get(split[1])): Decimal(rate)
@@ -1047,25 +1373,55 @@ class Importer:
                 for budget_start_end, budget_data in data.get("budget_limits", {}).items()
                 if (split := budget_start_end.split("::"))
             }
-            self.firefly_data = dacite.from_dict(FireflyData, data, config=dacite.Config(strict=True))
-        except json.decoder.JSONDecodeError:
+            # every field is a plain dict by now, so there's nothing for dacite to convert
+            self.firefly_data = FireflyData(**data)
+        except orjson.JSONDecodeError:
             pass
 
     def _update_cache(self) -> None:
+        with self._cache_lock:
+            if not self._cache_dir.exists():
+                self._cache_dir.mkdir(parents=True)
+            # firefly data is created concurrently, so work off copies rather than iterating over dicts that another
+            # thread may be adding to (copying a dict doesn't release the GIL)
+            firefly_data = FireflyData(
+                **{
+                    field.name: dict(getattr(self.firefly_data, field.name))
+                    for field in dataclasses.fields(self.firefly_data)
+                }
+            )
+            self._cache_path.write_bytes(pickle.dumps(firefly_data, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _inputs_fingerprint(self) -> str:
+        """
+        Checksum of everything that goes into parsing YNAB data, used to re-use parsed data across runs
+        """
+        checksum = hashlib.sha256(f"{VERSION}:{PARSED_CACHE_SCHEMA}".encode())
+        for path in (self.config_path, self.register_path, self.budget_path):
+            checksum.update(Path(path).read_bytes())
+        return checksum.hexdigest()
+
+    def _load_parsed_cache(self, path: Path) -> bool:
+        # NOTE: unpickling can run arbitrary code, so the cache directory must be trusted (see README)
+        if not path.exists():
+            return False
+
+        try:
+            with open(path, "rb") as f:
+                self.all_transactions, self.all_budgets = pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return False
+        print(f"Loaded {len(self.all_transactions)} transactions and {len(self.all_budgets)} budgets from cache")
+        return True
+
+    def _update_parsed_cache(self, path: Path) -> None:
         if not self._cache_dir.exists():
             self._cache_dir.mkdir(parents=True)
-        d = dataclasses.asdict(self.firefly_data)
-        d["forex_conversion"] = {
-            f"{currency_code}::{date.format('YYYY-MM-DD')}": str(rate)
-            for (currency_code, date), rate in self.firefly_data.forex_conversion.items()
-        }
-        d["budget_limits"] = {
-            f"{budget}::{start.format('YYYY-MM-DD')}::{end.format('YYYY-MM-DD')}": budget_data
-            for (budget, start, end), budget_data in self.firefly_data.budget_limits.items()
-        }
-        data = json.dumps(d)
-        with open(self._cache_path, "w") as f:
-            f.write(data)
+        # only keep parsed data for the latest inputs
+        for stale_path in self._cache_dir.glob("parsed_*.pkl"):
+            stale_path.unlink()
+        with open(path, "wb") as f:
+            pickle.dump((self.all_transactions, self.all_budgets), f, protocol=pickle.HIGHEST_PROTOCOL)
 
     def _create_currencies(self) -> None:
         # check cache
@@ -1099,31 +1455,33 @@ class Importer:
         for data in all_pages["data"]:
             self.firefly_data.budgets[data["attributes"]["name"]] = data
 
-        for budget in self.data.budgets.values():
-            data = {
-                "name": budget.name,
-                "active": budget.active,
-            }
-
-            try:
-                if budget.name in self.firefly_data.budgets:
-                    if _firefly_needs_update(data, self.firefly_data.budgets[budget.name]):
-                        response = self._session.put(
-                            f"/api/v1/budgets/{self.firefly_data.budgets[budget.name]['id']}", json=data,
-                        )
-                        self.firefly_data.budgets[budget.name] = response.json()["data"]
-                else:
-                    response = self._session.post("/api/v1/budgets", json=data)
-                    self.firefly_data.budgets[budget.name] = response.json()["data"]
-            except requests.HTTPError as e:
-                if e.response.status_code == 500:
-                    # ignore, because Firefly seems to do the right thing but fail still!?
-                    pass
-                else:
-                    raise
+        list(self._requests_pool.map(self._create_budget, self.data.budgets.values()))
         self._update_cache()
         print(f"Created {len(self.firefly_data.budgets)} budgets")
 
+    def _create_budget(self, budget: ImportData.Budget) -> None:
+        data = {
+            "name": budget.name,
+            "active": budget.active,
+        }
+
+        try:
+            if budget.name in self.firefly_data.budgets:
+                if _firefly_needs_update(data, self.firefly_data.budgets[budget.name]):
+                    response = self._session.put(
+                        f"/api/v1/budgets/{self.firefly_data.budgets[budget.name]['id']}", json=data,
+                    )
+                    self.firefly_data.budgets[budget.name] = response.json()["data"]
+            else:
+                response = self._session.post("/api/v1/budgets", json=data)
+                self.firefly_data.budgets[budget.name] = response.json()["data"]
+        except requests.HTTPError as e:
+            if e.response.status_code == 500:
+                # ignore, because Firefly seems to do the right thing but fail still!?
+                pass
+            else:
+                raise
+
     def _create_budget_limits(self) -> None:
         if self.config.skip_budget_limits_import:
             print("Skipping budget limits import as requested")
@@ -1133,35 +1491,38 @@ class Importer:
         if self.firefly_data.budget_limits:
             return
 
-        for budget, budget_data in self.firefly_data.budgets.items():
-            all_pages = self._session.get_all_pages(f"/api/v1/budgets/{budget_data['id']}/limits")
-
+        # limits of each budget are fetched concurrently
+        budget_ids = {budget: budget_data["id"] for budget, budget_data in self.firefly_data.budgets.items()}
+        budgets_pages = self._requests_pool.map(
+            lambda budget_id: self._session.get_all_pages(f"/api/v1/budgets/{budget_id}/limits"), budget_ids.values()
+        )
+        for budget, all_pages in zip(budget_ids, budgets_pages):
             for data in all_pages["data"]:
                 self.firefly_data.budget_limits[
                     (budget, arrow.get(data["attributes"]["start"]), arrow.get(data["attributes"]["end"]))
                 ] = data
 
-        for bg_hist in self.data.budget_history:
-            data = {
-                "budget_id": int(self.firefly_data.budgets[bg_hist.name]["id"]),
-                "start": bg_hist.start,
-                "end": bg_hist.end,
-                "amount": bg_hist.amount,
-            }
-
-            firefly_data = self.firefly_data.budget_limits.get((bg_hist.name, bg_hist.start, bg_hist.end))
-            if firefly_data:
-                if _firefly_needs_update(data, firefly_data):
-                    response = self._session.put(f"/api/v1/budgets/limits/{firefly_data['id']}", json=data,)
-                    self.firefly_data.budget_limits[(bg_hist.name, bg_hist.start, bg_hist.end)] = response.json()[
-                        "data"
-                    ]
-            else:
-                response = self._session.post(f"/api/v1/budgets/{data['budget_id']}/limits", json=data)
-                self.firefly_data.budget_limits[(bg_hist.name, bg_hist.start, bg_hist.end)] = response.json()["data"]
+        list(self._requests_pool.map(self._create_budget_limit, self.data.budget_history))
         self._update_cache()
         print(f"Created {len(self.firefly_data.budget_limits)} budget limits")
 
+    def _create_budget_limit(self, bg_hist: ImportData.BudgetHistory) -> None:
+        data = {
+            "budget_id": int(self.firefly_data.budgets[bg_hist.name]["id"]),
+            "start": bg_hist.start,
+            "end": bg_hist.end,
+            "amount": bg_hist.amount,
+        }
+
+        firefly_data = self.firefly_data.budget_limits.get((bg_hist.name, bg_hist.start, bg_hist.end))
+        if firefly_data:
+            if _firefly_needs_update(data, firefly_data):
+                response = self._session.put(f"/api/v1/budgets/limits/{firefly_data['id']}", json=data,)
+                self.firefly_data.budget_limits[(bg_hist.name, bg_hist.start, bg_hist.end)] = response.json()["data"]
+        else:
+            response = self._session.post(f"/api/v1/budgets/{data['budget_id']}/limits", json=data)
+            self.firefly_data.budget_limits[(bg_hist.name, bg_hist.start, bg_hist.end)] = response.json()["data"]
+
     def _create_available_budgets(self) -> None:
         print(
             "SKIPPED creating available budgets since this requires more complex calculation based on previous months "
@@ -1177,15 +1538,18 @@ class Importer:
         for data in all_pages["data"]:
             self.firefly_data.categories[data["attributes"]["name"]] = int(data["id"])
 
-        for category in self.data.categories:
-            if category in self.firefly_data.categories:
-                continue
-
-            response = self._session.post("/api/v1/categories", json={"name": category})
-            self.firefly_data.categories[category] = int(response.json()["data"]["id"])
+        # a category name may be listed more than once, only create it once
+        new_categories = list(
+            dict.fromkeys(category for category in self.data.categories if category not in self.firefly_data.categories)
+        )
+        list(self._requests_pool.map(self._create_category, new_categories))
         self._update_cache()
         print(f"Created {len(self.firefly_data.categories)} categories")
 
+    def _create_category(self, category: str) -> None:
+        response = self._session.post("/api/v1/categories", json={"name": category})
+        self.firefly_data.categories[category] = int(response.json()["data"]["id"])
+
     def _create_asset_accounts(self) -> None:
         # check cache
         if self.firefly_data.asset_accounts:
@@ -1194,40 +1558,58 @@ class Importer:
         all_pages = self._session.get_all_pages("/api/v1/accounts", params={"type": "asset"})
 
         for data in all_pages["data"]:
-            self.firefly_data.asset_accounts[data["attributes"]["name"]] = data
-
-        count = 0
-        for account in self.data.asset_accounts:
-            data = {
-                "name": account.name,
-                "active": True,
-                "type": "asset",
-                "account_role": account.role.value,
-                "currency_id": self.firefly_data.currencies[
-                    self.config.account(account.name).currency or self.config.currency
-                ],
-                "include_net_worth": True,
-            }
-            if account.opening_balance:
-                # firefly iii will not update date unless balance is non-zero
-                data.update({"opening_balance": account.opening_balance, "opening_balance_date": account.opening_date})
-            if account.role is ImportData.Account.Role.credit_card:
-                data["credit_card_type"] = "monthlyFull"
-                data["monthly_payment_date"] = account.monthly_payment_date
-
-            if account.name in self.firefly_data.asset_accounts:
-                if _firefly_needs_update(data, self.firefly_data.asset_accounts[account.name]):
-                    response = self._session.put(
-                        f"/api/v1/accounts/{self.firefly_data.asset_accounts[account.name]['id']}", json=data,
-                    )
-                    self.firefly_data.asset_accounts[account.name] = response.json()["data"]
-                    count += 1
-            else:
-                response = self._session.post("/api/v1/accounts", json=data)
-                self.firefly_data.asset_accounts[account.name] = response.json()["data"]
-                count += 1
+            self.firefly_data.asset_accounts[data["attributes"]["name"]] = _firefly_slim(data, ASSET_ACCOUNT_ATTRIBUTES)
+
+        # only accounts configured with their own currency differ from the default
+        default_currency_id = self.firefly_data.currencies[self.config.currency]
+        currency_ids = {
+            name: self.firefly_data.currencies[account.currency]
+            for name, account in self.config.accounts.items()
+            if account.currency
+        }
+        create = partial(self._create_asset_account, currency_ids=currency_ids, default_currency_id=default_currency_id)
+        count = sum(self._requests_pool.map(create, self.data.asset_accounts))
         print(f"Created / updated {count} / {len(self.firefly_data.asset_accounts)} asset accounts")
 
+    def _create_asset_account(
+        self, account: ImportData.Account, currency_ids: Dict[str, int], default_currency_id: int
+    ) -> bool:
+        """
+        :param currency_ids: map of account name to firefly currency id for accounts not in the default currency
+        :return: True if the account was created or updated
+        """
+        data = {
+            "name": account.name,
+            "active": True,
+            "type": "asset",
+            "account_role": account.role.value,
+            "currency_id": currency_ids.get(account.name, default_currency_id),
+            "include_net_worth": True,
+        }
+        if account.opening_balance:
+            # firefly iii will not update date unless balance is non-zero
+            data.update({"opening_balance": account.opening_balance, "opening_balance_date": account.opening_date})
+        if account.role is ImportData.Account.Role.credit_card:
+            data["credit_card_type"] = "monthlyFull"
+            data["monthly_payment_date"] = account.monthly_payment_date
+
+        if account.name in self.firefly_data.asset_accounts:
+            if _firefly_needs_update(data, self.firefly_data.asset_accounts[account.name]):
+                response = self._session.put(
+                    f"/api/v1/accounts/{self.firefly_data.asset_accounts[account.name]['id']}", json=data,
+                )
+                self.firefly_data.asset_accounts[account.name] = _firefly_slim(
+                    response.json()["data"], ASSET_ACCOUNT_ATTRIBUTES
+                )
+                return True
+            return False
+        else:
+            response = self._session.post("/api/v1/accounts", json=data)
+            self.firefly_data.asset_accounts[account.name] = _firefly_slim(
+                response.json()["data"], ASSET_ACCOUNT_ATTRIBUTES
+            )
+            return True
+
     def _update_inactive_accounts(self) -> None:
         count = 0
         for account in self.data.asset_accounts:
@@ -1258,7 +1640,9 @@ class Importer:
                 response = self._session.put(
                     f"/api/v1/accounts/{self.firefly_data.asset_accounts[account.name]['id']}", json=data,
                 )
-                self.firefly_data.asset_accounts[account.name] = response.json()["data"]
+                self.firefly_data.asset_accounts[account.name] = _firefly_slim(
+                    response.json()["data"], ASSET_ACCOUNT_ATTRIBUTES
+                )
                 count += 1
         self._update_cache()
         print(f"Updated {count} inactive asset accounts")
@@ -1279,43 +1663,57 @@ class Importer:
         all_pages = self._session.get_all_pages(f"/api/v1/accounts?type={account_type}")
 
         for data in all_pages["data"]:
-            firefly_data[data["attributes"]["name"]] = data
-
-        count = 0
-        for account in accounts:
-            data = {
-                "name": account,
-                "active": True,
-                "type": account_type,
-                "include_net_worth": True,
-            }
+            firefly_data[data["attributes"]["name"]] = _firefly_slim(data, PAYEE_ACCOUNT_ATTRIBUTES)
 
-            if account in firefly_data:
-                if _firefly_needs_update(data, firefly_data[account]):
-                    self._session.put(
-                        f"/api/v1/accounts/{firefly_data[account]['id']}", json=data,
-                    )
-                    count += 1
-            else:
-                response = self._session.post("/api/v1/accounts", json=data)
-                firefly_data[account] = response.json()["data"]["id"]
-                count += 1
+        count = sum(self._requests_pool.map(partial(self._create_payee_account, account_type), accounts))
         self._update_cache()
         print(f"Created / updated {count} / {len(firefly_data)} {account_type} accounts")
 
+    def _create_payee_account(self, account_type: str, account: str) -> bool:
+        """
+        :return: True if the account was created or updated
+        """
+        # e.g. self.firefly_data.revenue_accounts
+        firefly_data = getattr(self.firefly_data, f"{account_type}_accounts")
+
+        data = {
+            "name": account,
+            "active": True,
+            "type": account_type,
+            "include_net_worth": True,
+        }
+
+        if account in firefly_data:
+            if _firefly_needs_update(data, firefly_data[account]):
+                self._session.put(
+                    f"/api/v1/accounts/{firefly_data[account]['id']}", json=data,
+                )
+                return True
+            return False
+        else:
+            response = self._session.post("/api/v1/accounts", json=data)
+            firefly_data[account] = _firefly_slim(response.json()["data"], PAYEE_ACCOUNT_ATTRIBUTES)
+            return True
+
     def _verify_running_balance(self, month: arrow.Arrow) -> None:
         """
         Before moving to next month verify running balance to match data against YNAB
         """
-        # re-fetch asset accounts as of end of month
-        all_pages = self._session.get_all_pages(
-            "/api/v1/accounts", params={"type": "asset", "date": end_of_month(month)}
+        running_balances = self.data.running_balances[(month.year, month.month)]
+
+        # re-fetch just the accounts that had transactions this month, as of end of month
+        def _firefly_running_balance(account: str) -> Decimal:
+            response = self._session.get(
+                f"/api/v1/accounts/{self.firefly_data.asset_accounts[account]['id']}",
+                params={"date": end_of_month(month)},
+            )
+            return Decimal(str(orjson.loads(response.content)["data"]["attributes"]["current_balance"]))
+
+        firefly_running_balances = dict(
+            zip(running_balances, self._verify_pool.map(_firefly_running_balance, running_balances))
         )
-        firefly_running_balances: Dict[str, Decimal] = {}
-        for data in all_pages["data"]:
-            firefly_running_balances[data["attributes"]["name"]] = Decimal(str(data["attributes"]["current_balance"]))
 
-        for account, balance in self.data.running_balances[month].items():
+        for account, balance in running_balances.items():
             firefly_balance = firefly_running_balances[account]
             if callable(balance):
                 balance = balance()
@@ -1341,7 +1739,24 @@ class Importer:
         total = len(self.data.transaction_groups)
         progress_bar = ProgressBar(total, prefix="Import progress:", suffix="Complete", length=100)
         output = StringIO()
+        # everything transactions refer to has been created by now
+        firefly_ids = FireflyIds.from_firefly_data(self.firefly_data)
         current_month = self.data.transaction_groups[0].transactions[0].date.replace(day=1)
+        # transaction groups are independent of each other, so they're created concurrently, but only a month at a time
+        # since all of a month's transactions need to be in before its running balance can be verified - and a failed
+        # verification must stop the import before any of the next month is created
+        create = partial(self._create_transaction_group, firefly_ids=firefly_ids, output=output)
+        month_futures: List[Future] = []
+
+        def _wait_for_month() -> None:
+            nonlocal imported
+            # in order of completion, so that a failure is noticed as soon as it happens
+            for future in as_completed(month_futures):
+                future.result()
+                imported += 1
+                progress_bar.print(imported + ignored)
+            month_futures.clear()
+
         try:
             for tx_group in self.data.transaction_groups:
                 if (self.filter_max_date and tx_group.transactions[0].date > self.filter_max_date) or (
@@ -1353,85 +1768,48 @@ class Importer:
 
                 tx_month = tx_group.transactions[0].date.replace(day=1)
                 if tx_month != current_month:
+                    _wait_for_month()
                     self._verify_running_balance(current_month)
                     print(f"Imported and verified {current_month.format('MMMM YYYY')}")
                     current_month = tx_month
 
-                transactions_data = []
-                for tx in tx_group.transactions:
-                    tx_data = {
-                        "original_source": f"Firefly-YNAB4-Importer-v{VERSION}",
-                        "type": tx.__class__.__name__.lower(),
-                        "date": tx.date,
-                        "amount": tx.amount,
-                        "description": tx.description,
-                        "tags": tx.tags,
-                        "notes": tx.notes,
-                        "reconciled": tx.reconciled,
-                        "external_id": tx.external_id,
-                    }
-                    if isinstance(tx, ImportData.TransactionGroup.Deposit):
-                        tx_data.update(
-                            {
-                                "source_id": int(self.firefly_data.revenue_accounts[tx.payee]["id"]),
-                                "destination_id": int(self.firefly_data.asset_accounts[tx.account]["id"]),
-                            }
-                        )
-                        if tx.budget:
-                            tx_data["budget_id"] = int(self.firefly_data.budgets[tx.budget]["id"])
-                        if tx.category:
-                            tx_data["category_id"] = self.firefly_data.categories[tx.category]
-                    elif isinstance(tx, ImportData.TransactionGroup.Withdrawal):
-                        tx_data.update(
-                            {
-                                "source_id": int(self.firefly_data.asset_accounts[tx.account]["id"]),
-                                "destination_id": int(self.firefly_data.expense_accounts[tx.payee]["id"]),
-                            }
-                        )
-                        if tx.budget:
-                            tx_data["budget_id"] = int(self.firefly_data.budgets[tx.budget]["id"])
-                        if tx.category:
-                            tx_data["category_id"] = self.firefly_data.categories[tx.category]
-                    elif isinstance(tx, ImportData.TransactionGroup.Transfer):
-                        tx_data.update(
-                            {
-                                "source_id": int(self.firefly_data.asset_accounts[tx.from_account]["id"]),
-                                "destination_id": int(self.firefly_data.asset_accounts[tx.to_account]["id"]),
-                            }
-                        )
-                        if tx.foreign_amount:
-                            tx_data.update(
-                                {"foreign_amount": tx.foreign_amount, "foreign_currency_code": tx.foreign_currency_code}
-                            )
-                    transactions_data.append(tx_data)
-                data = {
-                    "error_if_duplicate_hash": True,
-                    "apply_rules": False,
-                    "group_title": tx_group.title,
-                    "transactions": transactions_data,
-                }
-                try:
-                    response = self._session.post("/api/v1/transactions", json=data, print_failures=False)
-                    tx_id = response.json()["data"]["id"]
-                    print(f"Created transaction #{tx_id}", file=output)
-                except requests.HTTPError as e:
-                    # check for duplicate transaction "failure"
-                    if e.response.status_code == 422:
-                        dup_errors, other_tx_errors, other_errors = _firefly_create_transaction_errors(e.response)
-                        if other_tx_errors or other_errors:
-                            print(e.response.json(), file=output)
-                            raise
-                        for tx_idx, dup_id in dup_errors.items():
-                            print(f"Ignoring transaction duplicate of #{dup_id}", file=output)
-                    else:
-                        print(e.response.json(), file=output)
-                        raise
-                imported += 1
-                progress_bar.print(imported + ignored)
+                month_futures.append(self._requests_pool.submit(create, tx_group))
+            _wait_for_month()
+        except BaseException:
+            # stop at the first failure, like a serial import would, rather than creating the groups still queued
+            for future in month_futures:
+                future.cancel()
+            raise
         finally:
             output.flush()
             print(output.getvalue())
 
+    def _create_transaction_group(
+        self, tx_group: ImportData.TransactionGroup, firefly_ids: FireflyIds, output: StringIO
+    ) -> None:
+        data = {
+            "error_if_duplicate_hash": True,
+            "apply_rules": False,
+            "group_title": tx_group.title,
+            "transactions": [tx._to_api_dict(firefly_ids) for tx in tx_group.transactions],
+        }
+        try:
+            response = self._session.post("/api/v1/transactions", json=data, print_failures=False)
+            tx_id = response.json()["data"]["id"]
+            print(f"Created transaction #{tx_id}", file=output)
+        except requests.HTTPError as e:
+            # check for duplicate transaction "failure"
+            if e.response.status_code == 422:
+                dup_errors, other_tx_errors, other_errors = _firefly_create_transaction_errors(e.response)
+                if other_tx_errors or other_errors:
+                    print(e.response.json(), file=output)
+                    raise
+                for tx_idx, dup_id in dup_errors.items():
+                    print(f"Ignoring transaction duplicate of #{dup_id}", file=output)
+            else:
+                print(e.response.json(), file=output)
+                raise
+
     def _post_import(self) -> None:
         self._update_inactive_accounts()
 
@@ -62,7 +62,7 @@ setup(
     # your project is installed. For an analysis of "install_requires" vs pip's
     # requirements files see:
     # https://packaging.python.org/en/latest/requirements.html
-    install_requires=["arrow", "dacite", "funcy", "requests[security]", "toml", "click", "Colorama"],
+    install_requires=["arrow", "dacite", "orjson", "requests[security]", "toml", "click", "Colorama"],
     tests_require=tests_require,
     # List additional groups of dependencies here (e.g. development
     # dependencies). You can install these using the following syntax,